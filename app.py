@@ -1,5 +1,5 @@
 from flask_restful import Api
-from apps import app, manager
+from apps import app, manager, outputJson
 import logging
 import sys
 from logging.handlers import RotatingFileHandler
@@ -7,19 +7,25 @@ from werkzeug.contrib.cache import SimpleCache
 
 cache = SimpleCache()
 api = Api(app, catch_all_404s=True)
+api.representations['application/json'] = outputJson
+
+
+def addLogFileHandler():
+    """Define log format and create a rotating log in storage/log/app.log"""
+    formatter = logging.Formatter(
+        "[%(asctime)s]{%(pathname)s:%(lineno)d} %(levelname)s - %(message)s")
+    log_handler = RotatingFileHandler(
+        "%s/%s" % (app.root_path, '../storage/log/app.log'), maxBytes=10000, backupCount=10)
+    log_handler.setLevel(logging.INFO)
+    log_handler.setFormatter(formatter)
+    app.logger.addHandler(log_handler)
+
 
 if __name__ == '__main__':
-    # define log format and create a rotating log
     try:
         if sys.argv[1] == 'db':
             manager.run()
     except Exception as e:
-        formatter = logging.Formatter(
-            "[%(asctime)s]{%(pathname)s:%(lineno)d} %(levelname)s - %(message)s")
-        log_handler = RotatingFileHandler(
-            "%s/%s" % (app.root_path, '../storage/log/app.log'), maxBytes=10000, backupCount=10)
-        log_handler.setLevel(logging.INFO)
-        log_handler.setFormatter(formatter)
-        app.logger.addHandler(log_handler)
+        addLogFileHandler()
 
         app.run(debug=False, host='0.0.0.0', port=5000)
@@ -1,18 +1,210 @@
-from flask import Blueprint
-from flask_restful import Api, Resource, reqparse, marshal
-from flask_jwt_extended import create_access_token, get_jwt_identity, jwt_required, get_jwt_claims
-from apps.users.model import Users
+from flask import Blueprint, request
+from flask_restful import Api, Resource, reqparse
+from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request, get_jwt_claims
+from apps.users.model import Users, EMAIL_REGEX
+from apps import app, db, password_hasher, outputJson, jsonResponse
 from passlib.hash import sha256_crypt
+from argon2.exceptions import VerificationError, InvalidHash
+from cachetools import TTLCache
+import threading
+import time
+import hashlib
+import orjson
+import uuid
+import jwt
 
 bp_auth = Blueprint('auth', __name__)
 api = Api(bp_auth)
+api.representations['application/json'] = outputJson
+
+# Verified (identity, claims) keyed by a digest of the Authorization header. The short ttl bounds
+# staleness far below the token expiry while skipping the decode and signature check for
+# clients that hit the auth endpoints repeatedly with the same token.
+_JWT_CACHE = TTLCache(maxsize=4096, ttl=5)
+_JWT_CACHE_LOCK = threading.Lock()
+
+# Signing settings read once from the config set up by JWTManager, instead of on every token
+_JWT_KEY = app.config['JWT_SECRET_KEY'].encode('utf-8')
+_JWT_ALGORITHM = app.config['JWT_ALGORITHM']
+_JWT_IDENTITY_CLAIM = app.config['JWT_IDENTITY_CLAIM']
+_JWT_USER_CLAIMS = app.config['JWT_USER_CLAIMS']
+_JWT_EXPIRES = int(app.config['JWT_ACCESS_TOKEN_EXPIRES'].total_seconds())
+
+# Tokens signed by refresh, keyed by identity and a digest of the claims, so bursts of refresh
+# calls get the same still-fresh token instead of signing a new one every time
+_REFRESH_TOKEN_CACHE = TTLCache(maxsize=10000, ttl=app.config['JWT_REFRESH_REUSE_SECONDS'])
+_REFRESH_TOKEN_CACHE_LOCK = threading.Lock()
+
+# Login error bodies never change, so they are serialized once and only wrapped in a Response per request
+_ERR_INVALID_EMAIL = (orjson.dumps({'message': 'Invalid email format!'}), 400)
+_ERR_TOO_MANY_ATTEMPTS = (orjson.dumps({'status': 'TOO_MANY_REQUESTS', 'message': 'too many failed login attempts, try again later'}), 429)
+_ERR_UNAUTHORIZED = (orjson.dumps({'status': 'UNAUTHORIZED', 'message': 'invalid email or password'}), 401)
+
+# The login arguments never change, so the parser is built once instead of on every request
+_LOGIN_PARSER = reqparse.RequestParser()
+_LOGIN_PARSER.add_argument('email', type=str, location='json', required=True)
+_LOGIN_PARSER.add_argument('password', type=str, location='json', required=True)
+
+# Checked when the email is unknown, so that path costs the same as a wrong password and
+# response time does not tell which emails are registered
+_DUMMY_PASSWORD_HASH = password_hasher.hash('happy-trash-dummy-password')
+
+# Failed login counters keyed by (email, client address). Every update restarts the entry's ttl, and
+# the least recently used entry is the one evicted when full, so an active counter is not pushed out
+_LOGIN_ATTEMPTS = TTLCache(maxsize=100000, ttl=app.config['LOGIN_ATTEMPT_WINDOW'])
+_LOGIN_ATTEMPTS_LOCK = threading.Lock()
+
+
+def fingerprint(data):
+    """Digest bytes into a 16 bytes BLAKE2b key for the in-process caches
+
+    A single call into hashlib's C implementation, and the cache keeps the short digest
+    instead of the whole token or serialized claims.
+    """
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+
+def getCachedJwt():
+    """Verify the JWT of the current request and return its identity and claims
+
+    The result is cached for a few seconds per token, so repeated requests with the same token
+    do not decode and verify it again.
+
+    Returns:
+        A tuple of (identity, claims) taken from the token
+
+    Raises:
+        Any flask_jwt_extended error raised by verify_jwt_in_request when the token is missing or invalid
+    """
+    key = request.headers.get('Authorization')
+    if key is not None:
+        key = fingerprint(key.encode('utf-8'))
+        with _JWT_CACHE_LOCK:
+            cached = _JWT_CACHE.get(key)
+        if cached is not None:
+            return cached
+
+    verify_jwt_in_request()
+    verified = (get_jwt_identity(), get_jwt_claims())
+
+    if key is not None:
+        with _JWT_CACHE_LOCK:
+            _JWT_CACHE[key] = verified
+    return verified
+
+
+def signAccessToken(identity, claims):
+    """Sign an access token with PyJWT directly
+
+    The payload has the same shape as flask_jwt_extended's create_access_token, so the tokens
+    are accepted by jwt_required, but without its per call config and callback lookups.
+
+    Args:
+        identity: a string of user's identity
+        claims: a dictionary of user's claims
+
+    Returns:
+        A string of signed access token
+    """
+    now = int(time.time())
+    payload = {
+        'iat': now,
+        'nbf': now,
+        'jti': str(uuid.uuid4()),
+        'exp': now + _JWT_EXPIRES,
+        _JWT_IDENTITY_CLAIM: identity,
+        'fresh': False,
+        'type': 'access'
+    }
+    if claims:
+        payload[_JWT_USER_CLAIMS] = claims
+    token = jwt.encode(payload, _JWT_KEY, algorithm=_JWT_ALGORITHM)
+    # PyJWT before 2.0 returns bytes
+    return token.decode('utf-8') if isinstance(token, bytes) else token
+
+
+def createRefreshedToken(identity, claims):
+    """Create an access token for refresh, reusing the one signed moments ago for the same identity and claims
+
+    Args:
+        identity: a string of user's identity taken from the active token
+        claims: a dictionary of user's claims taken from the active token
+
+    Returns:
+        A string of signed access token
+    """
+    key = (identity, fingerprint(orjson.dumps(claims, option=orjson.OPT_SORT_KEYS)))
+    with _REFRESH_TOKEN_CACHE_LOCK:
+        token = _REFRESH_TOKEN_CACHE.get(key)
+    if token is not None:
+        return token
+
+    token = signAccessToken(identity, claims)
+    with _REFRESH_TOKEN_CACHE_LOCK:
+        _REFRESH_TOKEN_CACHE[key] = token
+    return token
+
+
+def reserveLoginAttempt(email):
+    """Count one login attempt for an email from the current client, unless the limit is already reached
+
+    The check and the increment happen under one lock, so concurrent requests cannot all slip
+    under the limit before any of them is counted.
+
+    Args:
+        email: a string of normalized email inputted by user
+
+    Returns:
+        A boolean, True when the login may go on and False when the limit is reached
+    """
+    key = (email, request.remote_addr)
+    with _LOGIN_ATTEMPTS_LOCK:
+        attempts = _LOGIN_ATTEMPTS.get(key, 0)
+        if attempts >= app.config['LOGIN_ATTEMPT_LIMIT']:
+            return False
+        _LOGIN_ATTEMPTS[key] = attempts + 1
+    return True
+
+
+def resetLoginAttempts(email):
+    """Forget the failed logins of an email from the current client once it logged in successfully"""
+    with _LOGIN_ATTEMPTS_LOCK:
+        _LOGIN_ATTEMPTS.pop((email, request.remote_addr), None)
+
+
+def verifyPassword(password, password_hash):
+    """Check a password against the hash stored in users table
+
+    Rows created before the switch to Argon2 still hold sha256_crypt hashes ("$5$" prefix),
+    those are checked with passlib so the user can log in and get rehashed. Both libraries
+    compare the digests in constant time.
+
+    Args:
+        password: a string of password inputted by user
+        password_hash: a string of hash stored in users table
+
+    Returns:
+        A boolean, True when the password matches the hash
+    """
+    if password_hash.startswith('$5$'):
+        return sha256_crypt.verify(password, password_hash)
+    try:
+        return password_hasher.verify(password_hash, password)
+    except (VerificationError, InvalidHash):
+        return False
+
+
+def isPasswordNeedsRehash(password_hash):
+    """Check whether a stored hash is legacy sha256_crypt or Argon2 with outdated parameters"""
+    return password_hash.startswith('$5$') or password_hasher.check_needs_rehash(password_hash)
+
 
 class CreateTokenResources(Resource):
     """Class for storing HTTP request method for create token and get claim information"""
 
     def options(self):
         """Flask-CORS function to make Flask allowing our apps to support cross origin resource sharing (CORS)"""
-        return {'Status': 'OK'}, 200
+        return jsonResponse({'Status': 'OK'})
 
     def post(self):
         """Post data from user to create token
@@ -34,44 +226,62 @@ class CreateTokenResources(Resource):
         Raises: 
             Bad Request (400): An error that occured when some of the field is missing, or if the data is not valid (email and mobile phone inputted is wrong formatted)
             Unauthorized (401): A 401 error response indicates that the client tried to operate on a protected resource without providing the proper authorization. It may have provided the wrong credentials or none at all.
+            Too Many Requests (429): An error that occured when the email already failed to log in too many times from the same client within the window
         """
-        parser = reqparse.RequestParser()
-        parser.add_argument('name', location='json')
-        parser.add_argument('email', location='json', required=True)
-        parser.add_argument('mobile_number', location='json')
-        parser.add_argument('password', location='json', required=True)
-        args = parser.parse_args()
-
-        # We use isEmailAddressValid function to check whether email inputted is valid or not
-        
-        users = Users(args['name'], args['email'], args['mobile_number'], args['password'], False)
-        if not users.isEmailAddressValid(args['email']):
-            return { 'message': 'Invalid email format!'}, 400, {'Content-Type': 'application/json'}
+        args = _LOGIN_PARSER.parse_args()
+
+        # Emails are stored lowercased, so normalize the input to hit the unique index with a plain equality
+
+        email = args['email'].strip().lower()
+
+        # We use the precompiled email regex to check whether email inputted is valid or not
+
+        if not EMAIL_REGEX.match(email):
+            return jsonResponse(*_ERR_INVALID_EMAIL)
 
         
-        # Check whether email is exist in database
+        # Refuse before hashing anything when this email already failed too many times from this client
 
-        user = Users.query.filter_by(email=args['email']).first()
+        if not reserveLoginAttempt(email):
+            return jsonResponse(*_ERR_TOO_MANY_ATTEMPTS)
+
+        # Check whether email is exist in database. Only the columns needed for login are selected,
+        # so no ORM instance is built and no marshal schema is walked
+
+        user = db.session.query(Users.id, Users.name, Users.email, Users.mobile_number, Users.password, Users.role).filter(Users.email == email).first()
         if user is None:
-            return {'status': 'UNATHORIZED', 'message': 'invalid email or password'}, 401, {'Content-Type': 'application/json'}
+            verifyPassword(args['password'], _DUMMY_PASSWORD_HASH)
+            return jsonResponse(*_ERR_UNAUTHORIZED)
 
 
         # Check whether password is valid
 
-        user_data = marshal(user, Users.login_response_fields)
-        if not sha256_crypt.verify(args['password'], user_data['password']):
-            return {'status': 'UNATHORIZED', 'message': 'invalid email or password'}, 401, {'Content-Type': 'application/json'}
+        if not verifyPassword(args['password'], user.password):
+            return jsonResponse(*_ERR_UNAUTHORIZED)
+
+        resetLoginAttempts(email)
+
+        # Upgrade legacy sha256_crypt hash to Argon2 now that we know the plain password
+
+        if isPasswordNeedsRehash(user.password):
+            Users.query.filter_by(id=user.id).update({'password': password_hasher.hash(args['password'])})
+            db.session.commit()
 
         
-        # Create token
+        # Create token, password information is left out from user_claim
 
-        user_data.pop('password') # Put password information out from user_claim
-        token = create_access_token(identity=args['email'], user_claims=user_data)
+        user_data = {
+            'id': user.id,
+            'name': user.name,
+            'email': user.email,
+            'mobile_number': user.mobile_number,
+            'role': user.role
+        }
+        token = signAccessToken(email, user_data)
 
-        return {'status': 'OK',  'token': token}, 200, {'Content-Type': 'application/json'}
+        return jsonResponse({'status': 'OK',  'token': token})
 
     ## Function for get user information based on token
-    @jwt_required
     def get(self):
         """Get user information based on token
 
@@ -88,19 +298,18 @@ class CreateTokenResources(Resource):
             }
         """
 
-        claims = get_jwt_claims() # Make claims variable that contain user information generated by get_jwt_claims() from flask_jwt_extended module
+        identity, claims = getCachedJwt() # Make claims variable that contain user information taken from the verified token
 
-        return {'claims': claims}, 200, {'Content-Type': 'application/json'}
+        return jsonResponse({'claims': claims})
 
 class RefreshTokenResources(Resource):
     """Class for storing HTTP request method for refresh token"""
 
     def options(self):
         """Flask-CORS function to make Flask allowing our apps to support cross origin resource sharing (CORS)"""
-        return {'Status': 'OK'}, 200, {'Content-Type': 'application/json'}
+        return jsonResponse({'Status': 'OK'})
     
     ## Function for get newer token before previous token expired
-    @jwt_required
     def post(self):
         """Create new token based on active token
 
@@ -113,12 +322,15 @@ class RefreshTokenResources(Resource):
             }
         """
 
-        current_user = get_jwt_identity() # Make current user variable that contain user identity generated by get_jwt_identity() from flask_jwt_extended module
-        current_claim = get_jwt_claims() # Make claims variable that contain user information generated by get_jwt_claims() from flask_jwt_extended module
-        token = create_access_token(identity=current_user, user_claims=current_claim)
+        current_user, current_claim = getCachedJwt() # Make current user and claims variables that contain user identity and information taken from the verified token
+        token = createRefreshedToken(current_user, current_claim)
 
-        return {'status': 'OK',  'token': token}, 200, {'Content-Type': 'application/json'}
+        return jsonResponse({'status': 'OK',  'token': token})
         
 
 api.add_resource(CreateTokenResources, '')
 api.add_resource(RefreshTokenResources, '/refresh')
+
+# Load passlib's lazily selected sha256_crypt backend at import, so the first legacy login of a worker
+# does not pay for it. Argon2's C backend is already loaded by the dummy hash above
+verifyPassword('warmup', sha256_crypt.using(rounds=1000).hash('warmup'))
@@ -3,10 +3,11 @@ from flask_restful import Resource, reqparse, Api
 import requests
 import json
 from flask_jwt_extended import jwt_required
-from apps import userRequired
+from apps import userRequired, outputJson
 
 bp_google_maps = Blueprint('google_maps', __name__)
 api = Api(bp_google_maps)
+api.representations['application/json'] = outputJson
 
 
 class GoogleMapsResources(Resource):
@@ -7,12 +7,13 @@ from apps.order_details.model import ListOrderDetails
 from apps.trashes.model import ListTrash
 from apps.user_attributes.model import UserAttributes
 from apps.users.model import Users
-from apps import db, app
+from apps import db, app, outputJson
 from flask_jwt_extended import jwt_required, get_jwt_claims
 from apps import adminRequired, userRequired
 
 bp_orders = Blueprint('orders', __name__)
 api = Api(bp_orders)
+api.representations['application/json'] = outputJson
 
 
 class OrdersResource(Resource):
@@ -4,11 +4,12 @@ from .model import RewardHistories
 from apps.rewards.model import Rewards
 from apps.users.model import Users
 from sqlalchemy import desc
-from apps import app, db, userRequired, adminRequired
+from apps import app, db, userRequired, adminRequired, outputJson
 from flask_jwt_extended import jwt_required, get_jwt_claims
 
 bp_reward_histories = Blueprint('reward_histories', __name__)
 api = Api(bp_reward_histories)
+api.representations['application/json'] = outputJson
 
 
 class AdminRewardHistoriesResource(Resource):
@@ -2,7 +2,7 @@ from flask import Blueprint
 from flask_restful import Resource, Api, reqparse, marshal, inputs
 from .model import Rewards
 from sqlalchemy import desc
-from apps import app, db
+from apps import app, db, outputJson
 from flask_jwt_extended import jwt_required, get_jwt_claims
 from apps import adminRequired, userRequired
 from apps.user_attributes.model import UserAttributes
@@ -10,6 +10,7 @@ from apps.reward_histories.model import RewardHistories
 
 bp_rewards = Blueprint('rewards', __name__)
 api = Api(bp_rewards)
+api.representations['application/json'] = outputJson
 
 
 class RewardsResource(Resource):
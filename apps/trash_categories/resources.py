@@ -5,10 +5,11 @@ from flask_restful import Resource, Api, reqparse, marshal, inputs
 from sqlalchemy import desc
 from .model import ListTrashCategory
 from flask_jwt_extended import jwt_required, get_jwt_claims
-from apps import db, app, adminRequired
+from apps import db, app, adminRequired, outputJson
 
 bp_trash_categories = Blueprint('trash_categories', __name__)
 api = Api(bp_trash_categories)
+api.representations['application/json'] = outputJson
 
 
 class TrashCategoriesResource(Resource):
@@ -2,6 +2,10 @@ from apps import db
 from flask_restful import fields
 import re
 
+# Validation patterns are compiled once and shared, instead of going through re's cache on every call
+EMAIL_REGEX = re.compile(r"^[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+$", re.ASCII)
+MOBILE_NUMBER_REGEX = re.compile(r"^0[0-9]{9,}$", re.ASCII)
+
 
 class Users(db.Model):
     """Class for storing information about users table
@@ -23,7 +27,7 @@ class Users(db.Model):
     name = db.Column(db.String(50), nullable=False)
     email = db.Column(db.String(30), unique=True, nullable=False)
     mobile_number = db.Column(db.String(30), unique=True, nullable=False)
-    password = db.Column(db.String(100), nullable=False)
+    password = db.Column(db.String(255), nullable=False)
     role = db.Column(db.Boolean, nullable=False)
     date_created = db.Column(db.DateTime,  default=db.func.current_timestamp())
     date_modified = db.Column(db.DateTime,  default=db.func.current_timestamp(
@@ -37,15 +41,6 @@ class Users(db.Model):
         'role': fields.Boolean
     }
 
-    login_response_fields = {
-        'id': fields.Integer,
-        'name': fields.String,
-        'email': fields.String,
-        'mobile_number': fields.String,
-        'password': fields.String,
-        'role': fields.Boolean
-    }
-
     def __init__(self, name, email, mobile_number, password, role):
         """Inits Users with data that user inputted
 
@@ -66,13 +61,13 @@ class Users(db.Model):
 
     def isEmailAddressValid(self, email):
         """Validate the email address using a regex."""
-        if not re.match("^[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+$", email):
+        if not EMAIL_REGEX.match(email):
             return False
         return True
 
     def isMobileNumberValid(self, mobile_number):
         """Validate the mobile phone using a regex."""
-        if not re.match("^0[0-9]{9,}$", mobile_number):
+        if not MOBILE_NUMBER_REGEX.match(mobile_number):
             return False
         return True
 
@@ -3,12 +3,12 @@ from flask_restful import Resource, Api, reqparse, marshal, inputs
 from .model import Users
 from apps.user_attributes.model import UserAttributes
 from sqlalchemy import desc
-from apps import app, db, adminRequired, userRequired
+from apps import app, db, adminRequired, userRequired, password_hasher, outputJson
 from flask_jwt_extended import jwt_required, get_jwt_claims
-from passlib.hash import sha256_crypt
 
 bp_users = Blueprint('users', __name__)
 api = Api(bp_users)
+api.representations['application/json'] = outputJson
 
 
 class UsersResource(Resource):
@@ -53,6 +53,10 @@ class UsersResource(Resource):
         parser.add_argument('password', location='json', required=True)
         args = parser.parse_args()
 
+        # Emails are stored lowercased so login can look them up with a plain equality
+
+        args['email'] = args['email'].strip().lower()
+
         # We use isEmailAddressValid function to check whether email inputted is valid or not
 
         users = Users(args['name'], args['email'],
@@ -77,9 +81,9 @@ class UsersResource(Resource):
         if check_mobile_number is True:
             return {'message': 'Mobile number already listed!'}, 400, {'Content-Type': 'application/json'}
 
-        # Encrypt password using sha256
+        # Encrypt password using argon2
 
-        password_encrypted = sha256_crypt.hash(args['password'])
+        password_encrypted = password_hasher.hash(args['password'])
 
         # Input data to users table
 
@@ -88,10 +92,9 @@ class UsersResource(Resource):
         db.session.add(user)
         db.session.commit()
 
-        # get user id
+        # get user id straight from the instance, no need to marshal the whole row for it
 
-        user_contain = marshal(user, Users.response_fields)
-        user_id = user_contain['id']
+        user_id = user.id
 
         # Input data to user attributes table
 
@@ -194,6 +197,8 @@ class UsersResource(Resource):
 
         if args['email'] is not None:
 
+            args['email'] = args['email'].strip().lower()
+
             if not users.isEmailAddressValid(args['email']):
                 return {'message': 'Invalid email format!'}, 400, {'Content-Type': 'application/json'}
 
@@ -226,7 +231,7 @@ class UsersResource(Resource):
         # checks if user input a new password
 
         if args['password'] is not None:
-            password_encrypted = sha256_crypt.hash(args['password'])
+            password_encrypted = password_hasher.hash(args['password'])
             user_edited.password = password_encrypted
 
         db.session.commit()
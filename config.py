@@ -8,6 +8,8 @@ db_password = os.environ.get('DB_PASSWORD')
 db_uri = os.environ.get('DB_URI')
 db_name_production = os.environ.get('DB_NAME_PRODUCTION')
 db_name_testing = os.environ.get('DB_NAME_TESTING')
+# Connections kept per process, should match the number of threads serving requests in one worker
+db_pool_size = int(os.environ.get('DB_POOL_SIZE', 8))
 
 # For development will be deleted in production phase
 # db_user = 'HappyTrash'
@@ -18,7 +20,20 @@ db_name_testing = os.environ.get('DB_NAME_TESTING')
 
 
 class Config():
-    pass
+    """Class for storing configuration shared by every environment
+
+    Attributes:
+        SQLALCHEMY_ENGINE_OPTIONS: a dictionary of connection pool options. Connections are reused
+            most-recently-used first, recycled before MySQL's idle timeout so no pre-ping round trip
+            is needed, and never opened beyond the pool size
+    """
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_size': db_pool_size,
+        'max_overflow': 0,
+        'pool_pre_ping': False,
+        'pool_recycle': 1800,
+        'pool_use_lifo': True
+    }
 
 
 class DevelopmentConfig(Config):
@@ -38,7 +53,10 @@ class TestingConfig(Config):
     Attributes:
         TESTING: a boolean indicates the testing mode is activated or not
         SQLALCHEMI_DATABASE_URI: a string that contain information about uri to access testing database
+        SQLALCHEMY_ENGINE_OPTIONS: a dictionary of connection pool options, a small pool is enough for the test
+            client and the test code sharing one thread, with a little overflow for drop_all/create_all
     """
     TESTING = True
+    SQLALCHEMY_ENGINE_OPTIONS = dict(Config.SQLALCHEMY_ENGINE_OPTIONS, pool_size=2, max_overflow=2)
     # SQLALCHEMY_DATABASE_URI = 'mysql+pymysql://{}:{}@127.0.0.1:3306/happy_trash_testing'.format(db_user, db_password, db_uri, db_name)
     SQLALCHEMY_DATABASE_URI = 'mysql+pymysql://{}:{}@{}:3306/{}'.format(db_user, db_password, db_uri, db_name_testing)
@@ -0,0 +1,25 @@
+import os
+from config import db_pool_size
+
+bind = '0.0.0.0:5000'
+
+# Threaded workers: argon2-cffi releases the GIL while hashing, so the password checks of
+# concurrent logins run on separate cores while the other threads keep serving requests.
+# One thread per pooled database connection, the pool has no overflow so more threads would wait on it.
+worker_class = 'gthread'
+workers = int(os.environ.get('WEB_CONCURRENCY', 2))
+threads = db_pool_size
+
+# Import the app once in the master, so the password backend warm-up is paid before forking
+preload_app = True
+
+# Logs go to stderr for Docker to collect. Flask's default handler writes app.logger records to
+# wsgi.errors, which is gunicorn's error log. The rotating storage/log/app.log handler is only for
+# `python app.py`, several workers rotating one file would race each other
+errorlog = '-'
+
+
+def post_fork(server, worker):
+    """Drop the database connections inherited from the master, each worker opens its own"""
+    from apps import db
+    db.engine.dispose()
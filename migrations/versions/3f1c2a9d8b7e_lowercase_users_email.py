@@ -0,0 +1,29 @@
+"""lowercase users email
+
+Emails are now normalized to lowercase on register, profile edit and login, so
+existing rows are lowercased to stay reachable. The unique index on
+users.email is kept as is; two rows differing only by case have to be merged
+by hand before running this upgrade.
+
+Revision ID: 3f1c2a9d8b7e
+Revises: 
+Create Date: 2026-10-15 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f1c2a9d8b7e'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute('UPDATE users SET email = LOWER(TRIM(email))')
+
+
+def downgrade():
+    pass
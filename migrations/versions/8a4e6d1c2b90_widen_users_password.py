@@ -0,0 +1,34 @@
+"""widen users password
+
+Argon2id hashes are 97 characters with the current parameters and grow with
+longer salts, digests or cost strings. The column is widened so rehashing on
+login never truncates a hash.
+
+Revision ID: 8a4e6d1c2b90
+Revises: 3f1c2a9d8b7e
+Create Date: 2026-10-15 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8a4e6d1c2b90'
+down_revision = '3f1c2a9d8b7e'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.alter_column('users', 'password',
+                    existing_type=sa.String(length=100),
+                    type_=sa.String(length=255),
+                    existing_nullable=False)
+
+
+def downgrade():
+    op.alter_column('users', 'password',
+                    existing_type=sa.String(length=255),
+                    type_=sa.String(length=100),
+                    existing_nullable=False)
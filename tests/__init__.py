@@ -1,11 +1,11 @@
 import pytest
-import json
+import orjson
 import datetime
 import logging
-from flask import Flask, request, json
-from apps import app, db
+from flask import Flask, request
+from sqlalchemy import text
+from apps import app, db, password_hasher
 from app import cache
-import json
 from apps.users.model import Users
 from apps.user_attributes.model import UserAttributes
 from apps.trashes.model import ListTrash
@@ -13,12 +13,30 @@ from apps.trash_categories.model import ListTrashCategory
 from apps.rewards.model import Rewards
 from apps.reward_histories.model import RewardHistories
 from apps.orders.model import ListOrders
-from passlib.hash import sha256_crypt
+
+
+# One test client is shared by every test instead of being built on each call
+_CLIENT = None
+
+# Login bodies used by the token helpers, serialized once
+_USER_LOGIN_BODY = orjson.dumps({'email': 'user@user.com', 'password': 'user'})
+_ADMIN_LOGIN_BODY = orjson.dumps({'email': 'admin@admin.com', 'password': 'admin'})
+_INVALID_LOGIN_BODY = orjson.dumps({'email': 'admin@admin.com', 'password': 'user'})
+
+# Seed password hashes are computed once per test session. resetDatabase runs for every
+# test class and Argon2 is deliberately slow
+_USER_PASSWORD_HASH = password_hasher.hash('user')
+_ADMIN_PASSWORD_HASH = password_hasher.hash('admin')
+
+# The schema is rebuilt on the first reset only, later resets just empty the tables
+_SCHEMA_CREATED = False
 
 
 def call_client(request):
-    client = app.test_client()
-    return client
+    global _CLIENT
+    if _CLIENT is None:
+        _CLIENT = app.test_client()
+    return _CLIENT
 
 
 @pytest.fixture
@@ -27,18 +45,33 @@ def client(request):
 
 
 def resetDatabase():
-    """Reset database for testing purpose"""
-    db.drop_all()
-    db.create_all()
-
-    user_password_encrypted = sha256_crypt.hash('user')
-    admin_password_encrypted = sha256_crypt.hash('admin')
-
-    user = Users('user', 'user@user.com', '081122112211',
-                 user_password_encrypted, False)
-    admin = Users('admin', 'admin@admin.com', '0811221122112',
-                  admin_password_encrypted, True)
-    trash_category = ListTrashCategory(2, 'dummy_category')
+    """Reset database for testing purpose
+
+    The first call drops and creates every table so the schema follows the models. Later calls
+    truncate the tables instead, which also restarts the auto increment ids the seed data relies on.
+    """
+    global _SCHEMA_CREATED
+    if not _SCHEMA_CREATED:
+        db.drop_all()
+        db.create_all()
+        _SCHEMA_CREATED = True
+    else:
+        db.session.execute(text('SET FOREIGN_KEY_CHECKS = 0'))
+        for table in db.metadata.sorted_tables:
+            db.session.execute(text('TRUNCATE TABLE `{}`'.format(table.name)))
+        db.session.execute(text('SET FOREIGN_KEY_CHECKS = 1'))
+
+    # Seed rows go in as one multi-row INSERT per table, without ORM unit of work bookkeeping
+
+    db.session.execute(Users.__table__.insert(), [
+        {'name': 'user', 'email': 'user@user.com', 'mobile_number': '081122112211',
+         'password': _USER_PASSWORD_HASH, 'role': False},
+        {'name': 'admin', 'email': 'admin@admin.com', 'mobile_number': '0811221122112',
+         'password': _ADMIN_PASSWORD_HASH, 'role': True}
+    ])
+    db.session.execute(ListTrashCategory.__table__.insert(), [
+        {'admin_id': 2, 'category_name': 'dummy_category'}
+    ])
     trash_one = {
         "trash_category_id": 1,
         "admin_id": 2,
@@ -55,55 +88,36 @@ def resetDatabase():
         "photo": "dummy_photo",
         "point": 2
     }
-    trash_instance_one = ListTrash(trash_one)
-    trash_instance_two = ListTrash(trash_two)
+    db.session.execute(ListTrash.__table__.insert(), [trash_one, trash_two])
 
-    reward = Rewards(2, "reward dummy", 20, "photo", 20, True)
-    reward1 = Rewards(2, "reward dummy", 20, "photo", 20, True)
-    reward2 = Rewards(2, "reward dummy", 20, "photo", 20, True)
-    order = ListOrders({
+    reward = {'admin_id': 2, 'name': "reward dummy", 'point_to_claim': 20,
+              'photo': "photo", 'stock': 20, 'status': True}
+    db.session.execute(Rewards.__table__.insert(), [reward, reward, reward])
+    db.session.execute(ListOrders.__table__.insert(), [{
         'user_id': 1,
         'adress': "dummy",
         'time': datetime.datetime.utcnow(),
         'photo': 'url',
         'status': 'waiting'
-    })
-
-    db.session.add(user)
-    db.session.add(admin)
-    db.session.add(trash_category)
-    db.session.add(trash_instance_one)
-    db.session.add(trash_instance_two)
-    db.session.add(reward)
-    db.session.add(reward1)
-    db.session.add(reward2)
-    db.session.add(order)
-    db.session.commit()
-
-    user_attr = UserAttributes(1, 0, 0, False)
-    admin_attr = UserAttributes(2, 0, 0, False)
-    db.session.add(user_attr)
-    db.session.add(admin_attr)
+    }])
+    db.session.execute(UserAttributes.__table__.insert(), [
+        {'user_id': 1, 'point': 0, 'total_trash': 0, 'onboarding_status': False},
+        {'user_id': 2, 'point': 0, 'total_trash': 0, 'onboarding_status': False}
+    ])
     db.session.commit()
 
 
 def createTokenUser():
     token = cache.get('token-user')
     if token is None:
-        # prepare request input
-        data = {
-            'email': 'user@user.com',
-            'password': 'user'
-        }
-
         # do request
         req = call_client(request)
         res = req.post('/v1/auth',
-                       data=json.dumps(data),
+                       data=_USER_LOGIN_BODY,
                        content_type='application/json')
 
         # store response
-        res_json = json.loads(res.data)
+        res_json = orjson.loads(res.data)
 
         logging.warning('RESULT : %s', res_json)
 
@@ -122,20 +136,14 @@ def createTokenUser():
 def createTokenAdmin():
     token = cache.get('token-admin')
     if token is None:
-        # prepare request input
-        data = {
-            'email': 'admin@admin.com',
-            'password': 'admin'
-        }
-
         # do request
         req = call_client(request)
         res = req.post('/v1/auth',
-                       data=json.dumps(data),
+                       data=_ADMIN_LOGIN_BODY,
                        content_type='application/json')
 
         # store response
-        res_json = json.loads(res.data)
+        res_json = orjson.loads(res.data)
 
         logging.warning('RESULT : %s', res_json)
 
@@ -154,20 +162,14 @@ def createTokenAdmin():
 def createTokenInvalid():
     token = cache.get('token-admin')
     if token is None:
-        # prepare request input
-        data = {
-            'email': 'admin@admin.com',
-            'password': 'user'
-        }
-
         # do request
         req = call_client(request)
         res = req.post('/v1/auth',
-                       data=json.dumps(data),
+                       data=_INVALID_LOGIN_BODY,
                        content_type='application/json')  # seperti nembak API luar (contoh weather.io)
 
         # store response
-        res_json = json.loads(res.data)
+        res_json = orjson.loads(res.data)
 
         logging.warning('RESULT : %s', res_json)
 
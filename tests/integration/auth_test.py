@@ -1,5 +1,8 @@
 import json
+from passlib.hash import sha256_crypt
 from tests import app, client, cache, resetDatabase, createTokenUser
+from apps import db
+from apps.users.model import Users
 
 
 class TestAuth():
@@ -34,6 +37,20 @@ class TestAuth():
 
         assert res.status_code == 200
 
+    def testLoginEmailCaseInsensitive(self, client):
+        """test user login with a mixed case email surrounded by spaces, emails are normalized before lookup"""
+        data = {
+            "email": " USER@User.com ",
+            "password": "user"
+        }
+        res = client.post('/v1/auth',
+                          data=json.dumps(data),
+                          content_type='application/json')
+
+        res_json = json.loads(res.data)
+
+        assert res.status_code == 200
+
     def testLoginInvalidEmailFormat(self, client):
         """test user login with invalid credentials format, hence will raise 400(bad request) error"""
         data = {
@@ -76,6 +93,97 @@ class TestAuth():
 
         assert res.status_code == 401
 
+    def testLoginRehashLegacyPassword(self, client):
+        """test login of a user whose password is still a legacy sha256_crypt hash, the hash is upgraded to argon2id"""
+        db.session.execute(Users.__table__.insert(), [
+            {'name': 'legacy', 'email': 'legacy@user.com', 'mobile_number': '0819999999902',
+             'password': sha256_crypt.hash('legacy'), 'role': False}
+        ])
+        db.session.commit()
+
+        data = {
+            "email": "legacy@user.com",
+            "password": "legacy"
+        }
+        res = client.post('/v1/auth',
+                          data=json.dumps(data),
+                          content_type='application/json')
+
+        assert res.status_code == 200
+
+        db.session.remove()
+        stored = db.session.query(Users.password).filter(Users.email == 'legacy@user.com').scalar()
+        assert stored.startswith('$argon2id$')
+
+    def testLoginRateLimited(self, client):
+        """test repeated failed logins for one email, hence will raise 429(too many requests) error once the limit is reached,
+        even for the correct password"""
+        user = {
+            "name": "flood",
+            "email": "flood@user.com",
+            "mobile_number": "0819999999901",
+            "password": "flood"
+        }
+        res = client.post('/v1/users',
+                          data=json.dumps(user),
+                          content_type='application/json')
+        assert res.status_code == 200
+
+        data = {
+            "email": "flood@user.com",
+            "password": "wrong"
+        }
+        limit = app.config['LOGIN_ATTEMPT_LIMIT']
+        status_codes = []
+        for _ in range(limit + 1):
+            res = client.post('/v1/auth',
+                              data=json.dumps(data),
+                              content_type='application/json')
+            status_codes.append(res.status_code)
+
+        assert status_codes[:limit] == [401] * limit
+        assert status_codes[limit] == 429
+
+        data['password'] = 'flood'
+        res = client.post('/v1/auth',
+                          data=json.dumps(data),
+                          content_type='application/json')
+
+        assert res.status_code == 429
+
+    def testLoginSuccessResetsRateLimit(self, client):
+        """test a correct login after failed ones, the failed login counter starts over"""
+        user = {
+            "name": "reset",
+            "email": "reset@user.com",
+            "mobile_number": "0819999999903",
+            "password": "reset"
+        }
+        res = client.post('/v1/users',
+                          data=json.dumps(user),
+                          content_type='application/json')
+        assert res.status_code == 200
+
+        wrong = json.dumps({"email": "reset@user.com", "password": "wrong"})
+        right = json.dumps({"email": "reset@user.com", "password": "reset"})
+        limit = app.config['LOGIN_ATTEMPT_LIMIT']
+
+        for _ in range(limit - 1):
+            res = client.post('/v1/auth', data=wrong, content_type='application/json')
+            assert res.status_code == 401
+
+        res = client.post('/v1/auth', data=right, content_type='application/json')
+        assert res.status_code == 200
+
+        # a full limit of failures is allowed again before being refused
+        status_codes = []
+        for _ in range(limit + 1):
+            res = client.post('/v1/auth', data=wrong, content_type='application/json')
+            status_codes.append(res.status_code)
+
+        assert status_codes[:limit] == [401] * limit
+        assert status_codes[limit] == 429
+
     def testGetUserInformation(self, client):
         """test get user's jwt claims"""
         token = createTokenUser()
@@ -94,3 +202,24 @@ class TestAuth():
 
         res_json = json.loads(res.data)
         assert res.status_code == 200
+
+    def testRefreshTokenReused(self, client):
+        """test refreshing twice with the same token inside the reuse window, the same still valid token is returned"""
+        token = createTokenUser()
+        res = client.post('/v1/auth/refresh',
+                          headers={'Authorization': 'Bearer ' + token})
+        first_token = json.loads(res.data)['token']
+
+        res = client.post('/v1/auth/refresh',
+                          headers={'Authorization': 'Bearer ' + token})
+        second_token = json.loads(res.data)['token']
+
+        assert res.status_code == 200
+        assert first_token == second_token
+
+        res = client.get('/v1/auth',
+                         headers={'Authorization': 'Bearer ' + second_token})
+
+        res_json = json.loads(res.data)
+        assert res.status_code == 200
+        assert res_json['claims']['email'] == 'user@user.com'
@@ -83,6 +83,24 @@ class TestUsersRegister():
 
         assert res.status_code == 400
 
+    def testUserRegisterEmailCaseVariantAlreadyListed(self, client):
+        """Post a new user data to table with a case variant of an email that is already exist in database,
+        emails are stored lowercased hence will raise 400(bad request) error"""
+        data = {
+            "name": "dadang",
+            "email": " Dadang@Conello.COM ",
+            "mobile_number": "08121212124",
+            "password": "dadangajah"
+        }
+        res = client.post('/v1/users',
+                          data=json.dumps(data),
+                          content_type='application/json')
+
+        res_json = json.loads(res.data)
+
+        assert res.status_code == 400
+        assert res_json['message'] == 'Email already listed!'
+
     def testUserRegisterMobileNumberAlreadyListed(self, client):
         """Post a new user data to table with mobile number that is already exist in database,
         hence will raise 400(bad request) error"""